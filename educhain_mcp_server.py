@@ -5,21 +5,25 @@ Description: MCP server that leverages educhain library to generate educational
 """
 
 import os
+import re
 import json
+import asyncio
+import time
+import hashlib
 import logging
-from typing import Any, Dict, List, Optional, Union
-from contextlib import asynccontextmanager
-from collections.abc import AsyncIterator
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
 
-# Core MCP and EduChain imports
-from mcp.server.fastmcp import FastMCP
-from mcp.server.models import InitializationOptions
-from mcp.types import Tool, Resource, TextContent, ImageContent
-
-# EduChain and LLM imports
-from educhain import Educhain, LLMConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
+# Core MCP imports
+# EduChain and LLM imports are deferred to _initialize_components so that
+# importing this module (e.g. for --help or test discovery) stays cheap
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.types import TextContent
 from dotenv import load_dotenv
+from pydantic import Field, StringConstraints
+import orjson
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +32,193 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-request library logging is noise at INFO level
+logging.getLogger("langchain_google_genai").setLevel(logging.WARNING)
+
+# Response cache configuration. Bump CACHE_TEMPLATE_VERSION whenever prompts
+# change so previously cached content is no longer served.
+CACHE_TEMPLATE_VERSION = "v4"
+DEFAULT_CACHE_PATH = ".educhain_cache.sqlite3"
+DEFAULT_CACHE_TTL = 7 * 86400
+DEFAULT_CACHE_MEMORY_ITEMS = 512
+CACHE_PURGE_INTERVAL = 3600
+
+# Lesson plan defaults, also used when an overview is generated on its own
+DEFAULT_LESSON_DURATION = "45 minutes"
+DEFAULT_GRADE_LEVEL = "High School"
+
+# Matches duration parts such as "45 minutes", "1 hour", "1.5 hrs" or the "1h"
+# and "30m" in "1h30m"; only whitespace, commas or "and" may separate parts
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)[\s-]*(hours?|hrs?|h|minutes?|mins?|m)(?![a-z])")
+DURATION_SEPARATOR = re.compile(r"[\s,]*(?:and)?[\s,]*")
+
+# Tool parameter types. FastMCP validates arguments against these when it
+# parses a tool call, so handlers only ever see valid input.
+Topic = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+DifficultyLevel = Literal["Easy", "Medium", "Hard"]
+QuestionCount = Annotated[int, Field(ge=1, le=10)]
+FlashcardCount = Annotated[int, Field(ge=1, le=20)]
+
+# Prompt template for flashcard generation, defined once at module level
+FLASHCARD_TEMPLATE = """Format each flashcard with:
+- Front: Question or term
+- Back: Answer or definition
+- Category: Subject category
+
+Make sure the flashcards are educational and appropriate for the difficulty level.
+
+Difficulty level: {difficulty_level}
+Card type: {card_type}
+Generate {num} flashcards for the topic: {topic}
+"""
+
+# Prompt used when a lesson plan is streamed straight from Gemini
+LESSON_PLAN_FIELDS = (
+    "title", "objectives", "materials", "introduction",
+    "main_content", "activities", "assessment", "conclusion"
+)
+LESSON_PLAN_LIST_FIELDS = ("objectives", "materials", "activities")
+LESSON_PLAN_STREAM_PROMPT = """Create a lesson plan and respond with a single JSON object and nothing else.
+Use exactly these keys: "title" (string), "objectives" (list of strings),
+"materials" (list of strings), "introduction" (string), "main_content" (string),
+"activities" (list of strings), "assessment" (string), "conclusion" (string).
+
+Duration: {duration}
+Grade level: {grade_level}
+Learning objectives: {learning_objectives}
+Topic: {topic}
+"""
+
+# Default number of questions served by the sample-questions resource. Up to
+# PARALLEL_SAMPLE_THRESHOLD they are requested one per call (in parallel);
+# larger counts fall back to a single request to avoid rate-limit pressure
+DEFAULT_SAMPLE_QUESTION_COUNT = 3
+PARALLEL_SAMPLE_THRESHOLD = 4
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache for generated educational content
+    
+    The most recently used entries are also kept in a bounded in-process LRU
+    so hot topics are served without touching the database. Code running on
+    the event loop should use aget/aset, which only hand the SQLite work to a
+    worker thread; get/set are the blocking equivalents.
+    """
+    
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl: int = DEFAULT_CACHE_TTL,
+        memory_items: int = DEFAULT_CACHE_MEMORY_ITEMS
+    ):
+        """Open (or create) the cache database at the given path"""
+        self.path = path
+        self.ttl = ttl
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.purge_expired()
+    
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Create a cache configured from EDUCHAIN_CACHE_* environment variables"""
+        path = os.getenv("EDUCHAIN_CACHE_PATH", DEFAULT_CACHE_PATH)
+        ttl = int(os.getenv("EDUCHAIN_CACHE_TTL", DEFAULT_CACHE_TTL))
+        memory_items = int(os.getenv("EDUCHAIN_CACHE_MEMORY_ITEMS", DEFAULT_CACHE_MEMORY_ITEMS))
+        return cls(path, ttl, memory_items)
+    
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert into the in-process LRU, evicting the oldest entry if full"""
+        with self._memory_lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+    
+    def _recall(self, key: str) -> Optional[Any]:
+        """Return the value for key from the in-process LRU, or None"""
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+    
+    def _read(self, key: str) -> Optional[Any]:
+        """Read an unexpired value for key from SQLite and remember it"""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        value = orjson.loads(row[0])
+        self._remember(key, value, row[1])
+        return value
+    
+    def _write(self, key: str, value: Any, expires_at: float) -> None:
+        """Write value for key to SQLite"""
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value), expires_at)
+            )
+            self._conn.commit()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired (blocking)"""
+        value = self._recall(key)
+        return value if value is not None else self._read(key)
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key for the configured TTL (blocking)"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        self._write(key, value, expires_at)
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Like get, but reads SQLite in a worker thread on an LRU miss"""
+        value = self._recall(key)
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self._read, key)
+    
+    async def aset(self, key: str, value: Any) -> None:
+        """Like set, but writes SQLite in a worker thread"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        await asyncio.to_thread(self._write, key, value, expires_at)
+    
+    def purge_expired(self) -> int:
+        """Delete expired rows from SQLite and return how many were removed"""
+        with self._db_lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE expires_at < ?", (time.time(),)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+    
+    def close(self) -> None:
+        """Close the SQLite connection"""
+        with self._db_lock:
+            self._conn.close()
+
+
 class EduChainMCPServer:
     """
     EduChain MCP Server class that integrates educhain with MCP protocol
@@ -38,16 +229,32 @@ class EduChainMCPServer:
         self.gemini_model = None
         self.educhain_client = None
         self.mcp_server = None
+        self.cache = None
+        self.sample_question_count = DEFAULT_SAMPLE_QUESTION_COUNT
+        self._inflight: Dict[str, asyncio.Task] = {}
         self._initialize_components()
     
     def _initialize_components(self):
         """Initialize Gemini model and EduChain client"""
         try:
+            # EduChain and LLM imports
+            from educhain import Educhain, LLMConfig
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            
             # Initialize Gemini model
             api_key = os.getenv("GOOGLE_API_KEY")
             if not api_key:
                 raise ValueError("GOOGLE_API_KEY environment variable not set")
             
+            # Number of questions served by the sample-questions resource
+            self.sample_question_count = int(
+                os.getenv("EDUCHAIN_SAMPLE_QUESTION_COUNT", DEFAULT_SAMPLE_QUESTION_COUNT)
+            )
+            if self.sample_question_count < 1:
+                raise ValueError("EDUCHAIN_SAMPLE_QUESTION_COUNT must be at least 1")
+            
+            # A single model instance is shared by every request so its
+            # underlying client connection stays warm between tool calls
             self.gemini_model = ChatGoogleGenerativeAI(
                 model="gemini-2.0-flash-exp",
                 google_api_key=api_key,
@@ -55,31 +262,342 @@ class EduChainMCPServer:
                 max_tokens=2048
             )
             
+            # Warm up auth and the client channel off the critical path
+            if os.getenv("EDUCHAIN_WARMUP", "true").lower() == "true":
+                threading.Thread(target=self._warm_up_model, daemon=True).start()
+            
             # Create LLM configuration
             gemini_config = LLMConfig(custom_model=self.gemini_model)
             
             # Initialize EduChain client
             self.educhain_client = Educhain(gemini_config)
             
+            # Initialize response cache
+            self.cache = ResponseCache.from_env()
+            
             # Create MCP server
             self.mcp_server = FastMCP("EduChain Educational Content Server")
             
             logger.info("✅ EduChain MCP Server initialized successfully")
             
         except Exception as e:
-            logger.error(f"❌ Failed to initialize EduChain MCP Server: {str(e)}")
+            logger.error("❌ Failed to initialize EduChain MCP Server: %s", e)
             raise
     
+    def _warm_up_model(self):
+        """Send a tiny request so the first real tool call skips connection setup"""
+        try:
+            self.gemini_model.invoke("ping")
+            logger.info("Gemini model warmed up")
+        except Exception as e:
+            logger.warning("Gemini warm-up request failed: %s", e)
+    
+    async def _generate_questions(self, **kwargs) -> Any:
+        """Run educhain question generation in a worker thread"""
+        return await asyncio.to_thread(
+            self.educhain_client.qna_engine.generate_questions, **kwargs
+        )
+    
+    def _cache_key(self, namespace: str, params: Dict[str, Any]) -> str:
+        """Build a deterministic cache key from a namespace and call arguments"""
+        payload = {"template_version": CACHE_TEMPLATE_VERSION, **params}
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return f"{namespace}:{digest}"
+    
+    async def _cached_call(
+        self,
+        namespace: str,
+        params: Dict[str, Any],
+        fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Return the cached result for params, calling fn and caching its result on a miss
+        
+        Concurrent misses for the same key are coalesced: fn runs once in its own
+        task and every caller awaits that task through asyncio.shield, so
+        cancelling one caller never cancels the shared generation or the other
+        callers waiting on it.
+        
+        Args:
+            namespace: Cache namespace (usually the tool or resource name)
+            params: All arguments that influence the generated content
+            fn: Zero-argument coroutine function producing a JSON-serializable result
+        
+        Returns:
+            The cached or freshly generated result
+        """
+        key = self._cache_key(namespace, params)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            logger.info("Cache hit for %s", namespace)
+            return cached
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            logger.info("Joining in-flight request for %s", namespace)
+        else:
+            async def _generate_and_store() -> Any:
+                result = await fn()
+                await self.cache.aset(key, result)
+                return result
+            
+            def _finished(done: asyncio.Task) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+                # Mark any exception as retrieved in case every caller was cancelled
+                if not done.cancelled():
+                    done.exception()
+            
+            task = asyncio.create_task(_generate_and_store())
+            self._inflight[key] = task
+            task.add_done_callback(_finished)
+        
+        return await asyncio.shield(task)
+    
+    @staticmethod
+    def _canonical_text(value: str) -> str:
+        """Normalize free text for use in a cache key"""
+        return " ".join(value.split()).lower()
+    
+    @classmethod
+    def _canonical_duration(cls, duration: str) -> Any:
+        """
+        Convert a duration such as "1 hour 30 minutes" to minutes when possible
+        
+        Only strings made up entirely of duration parts are converted; anything
+        else (e.g. "3 x 45 minutes" or "two 45-minute sessions") falls back to
+        its canonical text so different lessons never share a cache key.
+        """
+        text = cls._canonical_text(duration)
+        minutes = 0.0
+        position = 0
+        for match in DURATION_PATTERN.finditer(text):
+            if not DURATION_SEPARATOR.fullmatch(text, position, match.start()):
+                return text
+            amount, unit = match.groups()
+            minutes += float(amount) * (60 if unit.startswith("h") else 1)
+            position = match.end()
+        
+        if position == 0 or not DURATION_SEPARATOR.fullmatch(text, position):
+            return text
+        return round(minutes)
+    
+    def _lesson_cache_params(
+        self,
+        topic: str,
+        duration: str,
+        grade_level: str,
+        learning_objectives: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Build canonical cache-key arguments for a lesson plan
+        
+        Equivalent requests (different casing, spacing, objective order or
+        duration wording) map to the same key. The original values are still
+        what gets sent to the LLM.
+        """
+        return {
+            "topic": self._canonical_text(topic),
+            "duration": self._canonical_duration(duration),
+            "grade_level": self._canonical_text(grade_level),
+            "learning_objectives": sorted({
+                self._canonical_text(objective) for objective in learning_objectives
+            })
+        }
+    
+    @staticmethod
+    def _format_topic_overview(topic: str, lesson_plan: Dict[str, Any]) -> str:
+        """Render the topic overview text from a formatted lesson plan"""
+        key_concepts = "\n".join(f"• {obj}" for obj in lesson_plan["objectives"])
+        materials = "\n".join(f"• {mat}" for mat in lesson_plan["materials"])
+        return f"""
+                Topic Overview: {topic}
+                
+                Description: {lesson_plan["introduction"]}
+                
+                Key Concepts:
+                {key_concepts}
+                
+                Materials Needed:
+                {materials}
+                
+                Assessment Methods:
+                {lesson_plan["assessment"]}
+                """
+    
+    @staticmethod
+    def _json_content(result: Dict[str, Any]) -> TextContent:
+        """
+        Serialize a tool result once with orjson into MCP text content
+        
+        Tools returning this are registered with structured_output=False so
+        FastMCP passes the content through instead of advertising TextContent
+        as an output schema and serializing it a second time.
+        """
+        return TextContent(type="text", text=orjson.dumps(result).decode())
+    
+    @staticmethod
+    def _wants_progress(ctx: Optional[Context]) -> bool:
+        """Return True if the calling client asked for progress notifications"""
+        if ctx is None:
+            return False
+        meta = ctx.request_context.meta
+        return meta is not None and meta.progressToken is not None
+    
+    @staticmethod
+    def _normalize_lesson_plan(raw: Any) -> Dict[str, Any]:
+        """
+        Validate a lesson plan parsed from streamed model output
+        
+        Missing list fields become [] (a lone string becomes a one-item list)
+        and missing text fields become "". Output that is not a JSON object,
+        has no title, or has a non-list value in a list field raises ValueError.
+        """
+        if not isinstance(raw, dict):
+            raise ValueError("Streamed lesson plan is not a JSON object")
+        if not raw.get("title"):
+            raise ValueError("Streamed lesson plan has no title")
+        
+        lesson_plan = {}
+        for field in LESSON_PLAN_FIELDS:
+            value = raw.get(field)
+            if field in LESSON_PLAN_LIST_FIELDS:
+                if value is None:
+                    value = []
+                elif isinstance(value, str):
+                    value = [value]
+                elif not isinstance(value, list):
+                    raise ValueError(f"Streamed lesson plan field '{field}' is not a list")
+            elif value is None:
+                value = ""
+            lesson_plan[field] = value
+        return lesson_plan
+    
+    async def _stream_lesson_plan(
+        self,
+        ctx: Context,
+        topic: str,
+        duration: str,
+        grade_level: str,
+        learning_objectives: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Stream a lesson plan from Gemini, reporting progress as chunks arrive
+        
+        Returns:
+            Dict with the lesson plan fields parsed from the streamed JSON
+        
+        Raises:
+            ValueError: If the streamed output is not a usable lesson plan
+        """
+        prompt = LESSON_PLAN_STREAM_PROMPT.format(
+            duration=duration,
+            grade_level=grade_level,
+            learning_objectives=", ".join(learning_objectives) or "None specified",
+            topic=topic
+        )
+        
+        buffer = []
+        received = 0
+        async for chunk in self.gemini_model.astream(prompt):
+            if not isinstance(chunk.content, str) or not chunk.content:
+                continue
+            buffer.append(chunk.content)
+            received += len(chunk.content)
+            await ctx.report_progress(received)
+        
+        from langchain_core.utils.json import parse_json_markdown
+        
+        try:
+            lesson = parse_json_markdown("".join(buffer))
+        except ValueError as e:
+            raise ValueError(f"Streamed lesson plan is not valid JSON: {str(e)}") from e
+        return self._normalize_lesson_plan(lesson)
+    
+    async def _generate_lesson_bundle(
+        self,
+        topic: str,
+        duration: str,
+        grade_level: str,
+        learning_objectives: List[str],
+        ctx: Optional[Context] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a lesson plan and its topic overview with a single LLM call
+        
+        For default-parameter lesson plans the overview is also stored under the
+        get_topic_overview cache key (keyed on topic alone), so the usual
+        overview -> lesson plan flow costs one generation instead of two.
+        Lesson plans with a custom duration, grade or objectives never replace
+        the topic's overview.
+        
+        Args:
+            topic: The subject/topic for the lesson plan
+            duration: Duration of the lesson
+            grade_level: Target grade level
+            learning_objectives: List of specific learning objectives
+            ctx: MCP request context; when the client requested progress
+                notifications the lesson plan is streamed from Gemini, falling
+                back to EduChain if the streamed output is unusable
+        
+        Returns:
+            Dict with "lesson_plan" (formatted lesson fields) and "overview" (text)
+        """
+        async def _generate() -> Dict[str, Any]:
+            lesson_plan = None
+            if self._wants_progress(ctx):
+                try:
+                    lesson_plan = await self._stream_lesson_plan(
+                        ctx, topic, duration, grade_level, learning_objectives
+                    )
+                except ValueError as e:
+                    logger.warning("Falling back to EduChain lesson plan: %s", e)
+            
+            if lesson_plan is None:
+                # Generate lesson plan using EduChain
+                lesson = await asyncio.to_thread(
+                    self.educhain_client.content_engine.generate_lesson_plan,
+                    topic=topic,
+                    duration=duration,
+                    grade_level=grade_level,
+                    learning_objectives=learning_objectives
+                )
+                
+                lesson_plan = {
+                    "title": lesson.title,
+                    "objectives": lesson.objectives,
+                    "materials": lesson.materials,
+                    "introduction": lesson.introduction,
+                    "main_content": lesson.main_content,
+                    "activities": lesson.activities,
+                    "assessment": lesson.assessment,
+                    "conclusion": lesson.conclusion
+                }
+            
+            overview = self._format_topic_overview(topic, lesson_plan)
+            if params == default_params:
+                await self.cache.aset(
+                    self._cache_key("get_topic_overview", {"topic": params["topic"]}),
+                    overview
+                )
+            return {"lesson_plan": lesson_plan, "overview": overview}
+        
+        params = self._lesson_cache_params(topic, duration, grade_level, learning_objectives)
+        default_params = self._lesson_cache_params(
+            topic, DEFAULT_LESSON_DURATION, DEFAULT_GRADE_LEVEL, []
+        )
+        return await self._cached_call("lesson_bundle", params, _generate)
+    
     def setup_tools(self):
         """Set up MCP tools for educational content generation"""
         
-        @self.mcp_server.tool()
-        def generate_mcq(
-            topic: str,
-            num_questions: int = 5,
-            difficulty_level: str = "Medium",
+        @self.mcp_server.tool(structured_output=False)
+        async def generate_mcq(
+            topic: Topic,
+            num_questions: QuestionCount = 5,
+            difficulty_level: DifficultyLevel = "Medium",
             custom_instructions: str = ""
-        ) -> Dict[str, Any]:
+        ) -> TextContent:
             """
             Generate multiple-choice questions for a given topic
             
@@ -90,63 +608,69 @@ class EduChainMCPServer:
                 custom_instructions: Additional instructions for question generation
             
             Returns:
-                Dict containing generated MCQ questions
+                JSON text content containing generated MCQ questions
             """
             try:
-                logger.info(f"Generating {num_questions} MCQ questions for topic: {topic}")
-                
-                # Validate inputs
-                if not topic.strip():
-                    raise ValueError("Topic cannot be empty")
-                
-                if num_questions < 1 or num_questions > 10:
-                    raise ValueError("Number of questions must be between 1 and 10")
+                logger.info("Generating %d MCQ questions for topic: %s", num_questions, topic)
+                
+                async def _generate() -> Dict[str, Any]:
+                    # Generate questions using EduChain
+                    questions = await self._generate_questions(
+                        topic=topic,
+                        num=num_questions,
+                        question_type="Multiple Choice",
+                        difficulty_level=difficulty_level,
+                        custom_instructions=custom_instructions
+                    )
+                    
+                    # Format response
+                    return {
+                        "success": True,
+                        "topic": topic,
+                        "num_questions": len(questions.questions),
+                        "difficulty_level": difficulty_level,
+                        "questions": [
+                            {
+                                "question_number": i,
+                                "question": q.question,
+                                "options": q.options,
+                                "correct_answer": q.correct_answer,
+                                "explanation": q.explanation
+                            }
+                            for i, q in enumerate(questions.questions, 1)
+                        ]
+                    }
                 
-                # Generate questions using EduChain
-                questions = self.educhain_client.qna_engine.generate_questions(
-                    topic=topic,
-                    num=num_questions,
-                    question_type="Multiple Choice",
-                    difficulty_level=difficulty_level,
-                    custom_instructions=custom_instructions
+                result = await self._cached_call(
+                    "generate_mcq",
+                    {
+                        "topic": topic,
+                        "num_questions": num_questions,
+                        "difficulty_level": difficulty_level,
+                        "custom_instructions": custom_instructions
+                    },
+                    _generate
                 )
                 
-                # Format response
-                result = {
-                    "success": True,
-                    "topic": topic,
-                    "num_questions": len(questions.questions),
-                    "difficulty_level": difficulty_level,
-                    "questions": []
-                }
-                
-                for i, q in enumerate(questions.questions, 1):
-                    result["questions"].append({
-                        "question_number": i,
-                        "question": q.question,
-                        "options": q.options,
-                        "correct_answer": q.correct_answer,
-                        "explanation": q.explanation
-                    })
-                
-                logger.info(f"✅ Successfully generated {len(questions.questions)} MCQ questions")
-                return result
+                logger.info("✅ Successfully generated %d MCQ questions", result["num_questions"])
+                return self._json_content(result)
                 
             except Exception as e:
-                logger.error(f"❌ Error generating MCQ questions: {str(e)}")
-                return {
+                logger.error("❌ Error generating MCQ questions: %s", e)
+                return self._json_content({
                     "success": False,
                     "error": str(e),
                     "topic": topic
-                }
+                })
         
-        @self.mcp_server.tool()
-        def generate_lesson_plan(
-            topic: str,
-            duration: str = "45 minutes",
-            grade_level: str = "High School",
-            learning_objectives: Optional[List[str]] = None
-        ) -> Dict[str, Any]:
+        @self.mcp_server.tool(structured_output=False)
+        async def generate_lesson_plan(
+            topic: Topic,
+            duration: str = DEFAULT_LESSON_DURATION,
+            grade_level: str = DEFAULT_GRADE_LEVEL,
+            learning_objectives: Optional[List[str]] = None,
+            ctx: Context = None
+        ) -> TextContent:
             """
             Generate a comprehensive lesson plan for a given topic
             
@@ -155,23 +679,20 @@ class EduChainMCPServer:
                 duration: Duration of the lesson (e.g., "45 minutes", "1 hour")
                 grade_level: Target grade level (Elementary, Middle School, High School, College)
                 learning_objectives: List of specific learning objectives
+                ctx: MCP request context (injected by FastMCP)
             
             Returns:
-                Dict containing the generated lesson plan
+                JSON text content containing the generated lesson plan
             """
             try:
-                logger.info(f"Generating lesson plan for topic: {topic}")
-                
-                # Validate inputs
-                if not topic.strip():
-                    raise ValueError("Topic cannot be empty")
+                logger.info("Generating lesson plan for topic: %s", topic)
                 
-                # Generate lesson plan using EduChain
-                lesson = self.educhain_client.content_engine.generate_lesson_plan(
+                bundle = await self._generate_lesson_bundle(
                     topic=topic,
                     duration=duration,
                     grade_level=grade_level,
-                    learning_objectives=learning_objectives or []
+                    learning_objectives=learning_objectives or [],
+                    ctx=ctx
                 )
                 
                 # Format response
@@ -180,36 +701,27 @@ class EduChainMCPServer:
                     "topic": topic,
                     "duration": duration,
                     "grade_level": grade_level,
-                    "lesson_plan": {
-                        "title": lesson.title,
-                        "objectives": lesson.objectives,
-                        "materials": lesson.materials,
-                        "introduction": lesson.introduction,
-                        "main_content": lesson.main_content,
-                        "activities": lesson.activities,
-                        "assessment": lesson.assessment,
-                        "conclusion": lesson.conclusion
-                    }
+                    "lesson_plan": bundle["lesson_plan"]
                 }
                 
-                logger.info(f"✅ Successfully generated lesson plan for {topic}")
-                return result
+                logger.info("✅ Successfully generated lesson plan for %s", topic)
+                return self._json_content(result)
                 
             except Exception as e:
-                logger.error(f"❌ Error generating lesson plan: {str(e)}")
-                return {
+                logger.error("❌ Error generating lesson plan: %s", e)
+                return self._json_content({
                     "success": False,
                     "error": str(e),
                     "topic": topic
-                }
+                })
         
-        @self.mcp_server.tool()
-        def generate_flashcards(
-            topic: str,
-            num_cards: int = 10,
-            difficulty_level: str = "Medium",
+        @self.mcp_server.tool(structured_output=False)
+        async def generate_flashcards(
+            topic: Topic,
+            num_cards: FlashcardCount = 10,
+            difficulty_level: DifficultyLevel = "Medium",
             card_type: str = "Definition"
-        ) -> Dict[str, Any]:
+        ) -> TextContent:
             """
             Generate flashcards for a given topic (Bonus Feature)
             
@@ -220,77 +732,70 @@ class EduChainMCPServer:
                 card_type: Type of flashcards (Definition, QA, Concept)
             
             Returns:
-                Dict containing generated flashcards
+                JSON text content containing generated flashcards
             """
             try:
-                logger.info(f"Generating {num_cards} flashcards for topic: {topic}")
-                
-                # Validate inputs
-                if not topic.strip():
-                    raise ValueError("Topic cannot be empty")
-                
-                if num_cards < 1 or num_cards > 20:
-                    raise ValueError("Number of cards must be between 1 and 20")
+                logger.info("Generating %d flashcards for topic: %s", num_cards, topic)
                 
                 # Generate flashcards using EduChain
                 # Note: This uses custom prompt template for flashcard generation
-                custom_template = """
-                Generate {num} flashcards for the topic: {topic}
-                Difficulty level: {difficulty_level}
-                Card type: {card_type}
-                
-                Format each flashcard with:
-                - Front: Question or term
-                - Back: Answer or definition
-                - Category: Subject category
-                
-                Make sure the flashcards are educational and appropriate for the difficulty level.
-                """
+                async def _generate() -> Dict[str, Any]:
+                    questions = await self._generate_questions(
+                        topic=topic,
+                        num=num_cards,
+                        question_type="Short Answer",
+                        difficulty_level=difficulty_level,
+                        custom_instructions=f"Create {card_type} flashcards",
+                        prompt_template=FLASHCARD_TEMPLATE,
+                        card_type=card_type
+                    )
+                    
+                    # Format as flashcards
+                    return {
+                        "success": True,
+                        "topic": topic,
+                        "num_cards": len(questions.questions),
+                        "difficulty_level": difficulty_level,
+                        "card_type": card_type,
+                        "flashcards": [
+                            {
+                                "card_number": i,
+                                "front": q.question,
+                                "back": q.correct_answer,
+                                "category": topic,
+                                "difficulty": difficulty_level
+                            }
+                            for i, q in enumerate(questions.questions, 1)
+                        ]
+                    }
                 
-                questions = self.educhain_client.qna_engine.generate_questions(
-                    topic=topic,
-                    num=num_cards,
-                    question_type="Short Answer",
-                    difficulty_level=difficulty_level,
-                    custom_instructions=f"Create {card_type} flashcards",
-                    prompt_template=custom_template
+                result = await self._cached_call(
+                    "generate_flashcards",
+                    {
+                        "topic": topic,
+                        "num_cards": num_cards,
+                        "difficulty_level": difficulty_level,
+                        "card_type": card_type
+                    },
+                    _generate
                 )
                 
-                # Format as flashcards
-                result = {
-                    "success": True,
-                    "topic": topic,
-                    "num_cards": len(questions.questions),
-                    "difficulty_level": difficulty_level,
-                    "card_type": card_type,
-                    "flashcards": []
-                }
-                
-                for i, q in enumerate(questions.questions, 1):
-                    result["flashcards"].append({
-                        "card_number": i,
-                        "front": q.question,
-                        "back": q.correct_answer,
-                        "category": topic,
-                        "difficulty": difficulty_level
-                    })
-                
-                logger.info(f"✅ Successfully generated {len(questions.questions)} flashcards")
-                return result
+                logger.info("✅ Successfully generated %d flashcards", result["num_cards"])
+                return self._json_content(result)
                 
             except Exception as e:
-                logger.error(f"❌ Error generating flashcards: {str(e)}")
-                return {
+                logger.error("❌ Error generating flashcards: %s", e)
+                return self._json_content({
                     "success": False,
                     "error": str(e),
                     "topic": topic
-                }
+                })
     
     def setup_resources(self):
         """Set up MCP resources for educational content"""
         
         @self.mcp_server.resource("educhain://topic/{topic}")
-        def get_topic_overview(topic: str) -> str:
+        async def get_topic_overview(topic: str) -> str:
             """
             Get an overview of a specific educational topic
             
@@ -301,36 +806,32 @@ class EduChainMCPServer:
                 String containing topic overview
             """
             try:
-                logger.info(f"Getting topic overview for: {topic}")
-                
-                # Use EduChain to generate topic overview
-                overview = self.educhain_client.content_engine.generate_lesson_plan(
-                    topic=topic,
-                    duration="Overview",
-                    grade_level="General"
+                logger.info("Getting topic overview for: %s", topic)
+                
+                async def _generate() -> str:
+                    # Generate the default lesson plan; its overview slice is
+                    # what this resource returns, and a follow-up lesson plan
+                    # request for the same topic is then served from cache
+                    bundle = await self._generate_lesson_bundle(
+                        topic=topic,
+                        duration=DEFAULT_LESSON_DURATION,
+                        grade_level=DEFAULT_GRADE_LEVEL,
+                        learning_objectives=[]
+                    )
+                    return bundle["overview"]
+                
+                return await self._cached_call(
+                    "get_topic_overview",
+                    {"topic": self._canonical_text(topic)},
+                    _generate
                 )
                 
-                return f"""
-                Topic Overview: {topic}
-                
-                Description: {overview.introduction}
-                
-                Key Concepts:
-                {chr(10).join(f"• {obj}" for obj in overview.objectives)}
-                
-                Materials Needed:
-                {chr(10).join(f"• {mat}" for mat in overview.materials)}
-                
-                Assessment Methods:
-                {overview.assessment}
-                """
-                
             except Exception as e:
-                logger.error(f"❌ Error getting topic overview: {str(e)}")
+                logger.error("❌ Error getting topic overview: %s", e)
                 return f"Error retrieving overview for {topic}: {str(e)}"
         
         @self.mcp_server.resource("educhain://questions/{topic}")
-        def get_sample_questions(topic: str) -> str:
+        async def get_sample_questions(topic: str) -> str:
             """
             Get sample questions for a specific topic
             
@@ -341,54 +842,96 @@ class EduChainMCPServer:
                 String containing sample questions
             """
             try:
-                logger.info(f"Getting sample questions for: {topic}")
-                
-                # Generate sample questions
-                questions = self.educhain_client.qna_engine.generate_questions(
-                    topic=topic,
-                    num=3,
-                    question_type="Multiple Choice",
-                    difficulty_level="Medium"
+                logger.info("Getting sample questions for: %s", topic)
+                
+                async def _generate() -> str:
+                    # Generate sample questions
+                    if self.sample_question_count <= PARALLEL_SAMPLE_THRESHOLD:
+                        # One single-question request per sample, run concurrently
+                        responses = await asyncio.gather(*(
+                            self._generate_questions(
+                                topic=topic,
+                                num=1,
+                                question_type="Multiple Choice",
+                                difficulty_level="Medium",
+                                custom_instructions=(
+                                    f"This is sample question {n} of {self.sample_question_count}; "
+                                    "cover a different aspect of the topic."
+                                )
+                            )
+                            for n in range(1, self.sample_question_count + 1)
+                        ))
+                        questions = [q for response in responses for q in response.questions]
+                    else:
+                        response = await self._generate_questions(
+                            topic=topic,
+                            num=self.sample_question_count,
+                            question_type="Multiple Choice",
+                            difficulty_level="Medium"
+                        )
+                        questions = response.questions
+                    
+                    parts = [f"Sample Questions for: {topic}\n\n"]
+                    
+                    for i, q in enumerate(questions, 1):
+                        parts.append(f"Question {i}: {q.question}\n")
+                        parts.extend(f"  {j}. {option}\n" for j, option in enumerate(q.options, 1))
+                        parts.append(
+                            f"Correct Answer: {q.correct_answer}\n"
+                            f"Explanation: {q.explanation}\n\n"
+                        )
+                    
+                    return "".join(parts)
+                
+                return await self._cached_call(
+                    "get_sample_questions",
+                    {"topic": topic, "num": self.sample_question_count},
+                    _generate
                 )
                 
-                result = f"Sample Questions for: {topic}\n\n"
-                
-                for i, q in enumerate(questions.questions, 1):
-                    result += f"Question {i}: {q.question}\n"
-                    for j, option in enumerate(q.options, 1):
-                        result += f"  {j}. {option}\n"
-                    result += f"Correct Answer: {q.correct_answer}\n"
-                    result += f"Explanation: {q.explanation}\n\n"
-                
-                return result
-                
             except Exception as e:
-                logger.error(f"❌ Error getting sample questions: {str(e)}")
+                logger.error("❌ Error getting sample questions: %s", e)
                 return f"Error retrieving sample questions for {topic}: {str(e)}"
     
-    def run_server(self):
-        """Run the MCP server"""
+    async def _purge_cache_periodically(self):
+        """Remove expired cache rows every CACHE_PURGE_INTERVAL seconds"""
+        while True:
+            await asyncio.sleep(CACHE_PURGE_INTERVAL)
+            try:
+                removed = await asyncio.to_thread(self.cache.purge_expired)
+                logger.info("Purged %d expired cache entries", removed)
+            except Exception as e:
+                logger.warning("Cache purge failed: %s", e)
+    
+    async def run_server(self):
+        """Run the MCP server on the current event loop"""
         try:
             # Setup tools and resources
             self.setup_tools()
             self.setup_resources()
             
+            # Keep the cache file from growing with expired entries
+            purge_task = asyncio.create_task(self._purge_cache_periodically())
+            
             logger.info("🚀 Starting EduChain MCP Server...")
             
             # Run the server
-            self.mcp_server.run()
-            
+            try:
+                await self.mcp_server.run_stdio_async()
+            finally:
+                purge_task.cancel()
+                
         except Exception as e:
-            logger.error(f"❌ Error running MCP server: {str(e)}")
+            logger.error("❌ Error running MCP server: %s", e)
             raise
 
 # Main execution
 if __name__ == "__main__":
     try:
         server = EduChainMCPServer()
-        server.run_server()
+        asyncio.run(server.run_server())
     except KeyboardInterrupt:
         logger.info("👋 Server stopped by user")
     except Exception as e:
-        logger.error(f"💥 Fatal error: {str(e)}")
+        logger.error("💥 Fatal error: %s", e)
         exit(1)
\ No newline at end of file
@@ -0,0 +1,209 @@
+# test_mcp_server.py
+import os
+import time
+import asyncio
+import tempfile
+
+from educhain_mcp_server import EduChainMCPServer, ResponseCache
+
+def _make_server(tmp):
+    """Build a server with only the response cache wired up (no LLM or MCP)"""
+    server = EduChainMCPServer.__new__(EduChainMCPServer)
+    server.cache = ResponseCache(os.path.join(tmp, "cache.sqlite3"))
+    server._inflight = {}
+    return server
+
+def test_response_cache_round_trip():
+    """Values written with aset are readable by a fresh cache on the same file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        
+        cache = ResponseCache(path)
+        asyncio.run(cache.aset("key", {"questions": [1, 2, 3]}))
+        cache.close()
+        
+        reopened = ResponseCache(path)
+        assert asyncio.run(reopened.aget("key")) == {"questions": [1, 2, 3]}
+        assert asyncio.run(reopened.aget("missing")) is None
+        reopened.close()
+
+def test_response_cache_purges_expired_rows():
+    """Expired entries are never served and are removed by purge_expired"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "cache.sqlite3"), ttl=-1)
+        cache.set("stale", {"topic": "Algebra"})
+        
+        assert cache.get("stale") is None
+        assert cache.purge_expired() == 1
+        cache.close()
+
+def test_response_cache_memory_tier_evicts_least_recently_used():
+    """The in-process tier holds memory_items entries and a hit refreshes recency"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "cache.sqlite3"), memory_items=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        assert cache._recall("a") == 1
+        assert list(cache._memory) == ["b", "a"]
+        
+        cache.set("c", 3)
+        assert list(cache._memory) == ["a", "c"]
+        assert cache._recall("b") is None
+        assert cache.get("b") == 2
+        assert list(cache._memory) == ["c", "b"]
+        cache.close()
+
+def test_response_cache_memory_tier_drops_expired_entries():
+    """An expired in-process entry is removed instead of being served"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "cache.sqlite3"))
+        cache._remember("stale", {"topic": "Algebra"}, time.time() - 1)
+        
+        assert cache._recall("stale") is None
+        assert "stale" not in cache._memory
+        cache.close()
+
+def test_response_cache_sqlite_hit_fills_memory_tier():
+    """A value read from SQLite is remembered with its stored expiry"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        
+        cache = ResponseCache(path)
+        cache.set("key", {"topic": "Algebra"})
+        expires_at = cache._memory["key"][1]
+        cache.close()
+        
+        reopened = ResponseCache(path)
+        assert "key" not in reopened._memory
+        assert asyncio.run(reopened.aget("key")) == {"topic": "Algebra"}
+        assert reopened._memory["key"] == ({"topic": "Algebra"}, expires_at)
+        reopened.close()
+
+def test_normalize_lesson_plan_fills_missing_fields():
+    """Missing list fields default to [] and missing text fields to an empty string"""
+    lesson_plan = EduChainMCPServer._normalize_lesson_plan({
+        "title": "Photosynthesis",
+        "materials": "Leaves"
+    })
+    
+    assert lesson_plan["objectives"] == []
+    assert lesson_plan["materials"] == ["Leaves"]
+    assert lesson_plan["activities"] == []
+    assert lesson_plan["introduction"] == ""
+    EduChainMCPServer._format_topic_overview("Photosynthesis", lesson_plan)
+
+def test_normalize_lesson_plan_rejects_unusable_output():
+    """Non-object output, a missing title or a malformed list field raise ValueError"""
+    for raw in ([{"title": "A"}], {"objectives": ["x"]}, {"title": "A", "objectives": 3}):
+        try:
+            EduChainMCPServer._normalize_lesson_plan(raw)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted unusable lesson plan: {raw!r}")
+
+def test_cached_call_survives_leader_cancellation():
+    """Cancelling the first caller does not cancel callers that joined it"""
+    async def scenario(server):
+        calls = []
+        started = asyncio.Event()
+        release = asyncio.Event()
+        
+        async def generate():
+            calls.append(1)
+            started.set()
+            await release.wait()
+            return {"topic": "Photosynthesis"}
+        
+        leader = asyncio.create_task(server._cached_call("t", {"topic": "x"}, generate))
+        await started.wait()
+        joiner = asyncio.create_task(server._cached_call("t", {"topic": "x"}, generate))
+        await asyncio.sleep(0.05)
+        
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        
+        assert await joiner == {"topic": "Photosynthesis"}
+        assert leader.cancelled()
+        assert calls == [1]
+        assert server._inflight == {}
+        assert await server._cached_call("t", {"topic": "x"}, generate) == {"topic": "Photosynthesis"}
+        assert calls == [1]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        server = _make_server(tmp)
+        asyncio.run(scenario(server))
+        server.cache.close()
+
+def test_cached_call_shares_exceptions_between_callers():
+    """Every coalesced caller sees the failure, and nothing is cached"""
+    async def scenario(server):
+        calls = []
+        
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            raise RuntimeError("quota exceeded")
+        
+        results = await asyncio.gather(
+            *(server._cached_call("t", {"topic": "x"}, generate) for _ in range(3)),
+            return_exceptions=True
+        )
+        
+        assert [type(r) for r in results] == [RuntimeError] * 3
+        assert calls == [1]
+        assert server._inflight == {}
+        assert await server.cache.aget(server._cache_key("t", {"topic": "x"})) is None
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        server = _make_server(tmp)
+        asyncio.run(scenario(server))
+        server.cache.close()
+
+def test_canonical_duration_converts_whole_durations():
+    """Durations made only of number/unit parts are converted to minutes"""
+    cases = {
+        "45 minutes": 45,
+        "45-minute": 45,
+        "90 min": 90,
+        "1 Hour": 60,
+        "1.5 hrs": 90,
+        "1 hour 30 minutes": 90,
+        "1 hour and 30 minutes": 90,
+        "1h30m": 90,
+    }
+    for duration, minutes in cases.items():
+        assert EduChainMCPServer._canonical_duration(duration) == minutes, duration
+
+def test_canonical_duration_keeps_other_text():
+    """Anything with extra words stays as text instead of collapsing to one part"""
+    for duration in (
+        "3 x 45 minutes",
+        "45 minutes per day for 2 weeks",
+        "two 45-minute sessions",
+        "2 months",
+        "Overview",
+    ):
+        assert EduChainMCPServer._canonical_duration(duration) == " ".join(duration.lower().split())
+    assert EduChainMCPServer._canonical_duration("1h30m") != EduChainMCPServer._canonical_duration("30 minutes")
+
+def test_lesson_cache_params_canonicalizes_equivalent_requests():
+    """Casing, spacing, objective order/duplicates and duration wording share a key"""
+    server = EduChainMCPServer.__new__(EduChainMCPServer)
+    first = server._lesson_cache_params(
+        "  Photosynthesis ", "1 hour", "High School", ["Explain light reactions", "Define ATP"]
+    )
+    second = server._lesson_cache_params(
+        "photosynthesis", "60 minutes", "high  school",
+        ["define atp", "Explain Light Reactions", "Define ATP "]
+    )
+    
+    assert first == second == {
+        "topic": "photosynthesis",
+        "duration": 60,
+        "grade_level": "high school",
+        "learning_objectives": ["define atp", "explain light reactions"],
+    }
+    assert server._lesson_cache_params("Photosynthesis", "3 x 45 minutes", "High School", []) != \
+        server._lesson_cache_params("Photosynthesis", "45 minutes", "High School", [])